@@ -1,23 +1,609 @@
 
-import inspect
+import functools
+import gzip
+import hashlib
 import logging
+import mimetypes
 import os
 import sys
-from textwrap import dedent
+import time
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
 
-from jinja2 import ChoiceLoader, FileSystemLoader, PrefixLoader
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-from jupyterhub.handlers.static import LogoHandler
-from jupyterhub.log import CoroutineLogFormatter
-from jupyterhub.utils import url_path_join
-from jupyterhub._data import DATA_FILES_PATH
-
-from tornado import ioloop, web
+from tornado import escape, httpserver, httputil, ioloop, iostream, routing, web
 from tornado.log import app_log, access_log, gen_log
 
 from traitlets import default, Bool, Dict, Instance, Integer, List, Unicode
 from traitlets.config import Application
 
+_ENV_PREFIX = os.environ.get("JUPYTERHUB_SERVICE_PREFIX")
+
+# Content types worth precompressing, beyond text/*; binary formats like PNG
+# and WOFF2 are already compressed and are left alone.
+_COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml"
+}
+
+# Assets larger than this are streamed from disk uncompressed rather than
+# held in memory in compressed form.
+_COMPRESS_LIMIT = 10 * 1024 * 1024
+
+# JupyterHub and Jinja2 are imported lazily, inside the functions that need
+# them, so that merely importing this module (e.g. for `--help` or
+# `--generate-config`) does not pay their import cost.
+
+@functools.lru_cache(maxsize=None)
+def _data_files_path():
+    """Return JupyterHub's data files path"""
+    from jupyterhub._data import DATA_FILES_PATH
+    return DATA_FILES_PATH
+
+@functools.lru_cache(maxsize=None)
+def _hub_templates_path():
+    """Return the path to JupyterHub's Jinja2 templates"""
+    return os.path.join(_data_files_path(), "templates")
+
+@functools.lru_cache(maxsize=None)
+def _hub_static_path():
+    """Return the path to JupyterHub's static assets"""
+    return os.path.join(_data_files_path(), "static")
+
+@functools.lru_cache(maxsize=None)
+def _hub_logo_file():
+    """Return the path to the JupyterHub logo"""
+    return os.path.join(_data_files_path(), "static/images/jupyterhub-80.png")
+
+# Help strings are pre-dedented so importing this module does not pay for
+# textwrap.dedent on every trait declaration.
+_HELP_AUTO_RELOAD = """
+Whether Jinja2 templates reload when their sources change
+
+By default, templates are compiled once and reused for the life of
+the service.  Set this to `True` during development to pick up
+template edits without restarting the service.
+"""
+
+_HELP_CONFIG_FILE = """
+Name of file used to configure service
+
+By default, the name of the configuration file is `{name}_config.py`,
+where `{name}` is the name of the service.  See documentation on the
+`name` parameter to see how it is determined by default.
+"""
+
+_HELP_GENERATE_CONFIG = """
+Whether or not to produce default configuration file and exit
+
+If `True`, a default configuration script will be produced to standard
+output and the service then exits.  If `False` the service initializes
+and runs.
+"""
+
+_HELP_LOGO_FILE = """
+Path to logo file
+
+By default, the logo file path is the path to the JupyterHub logo, but
+this can be changed to another logo file.
+"""
+
+_HELP_NAME = """
+Name of service
+
+By default, the name of a service is the same as its package name.
+"""
+
+_HELP_OFFLOAD_STATIC = """
+Whether static assets are served by a front-end proxy instead
+
+If `True`, the service installs no static or logo handlers, leaves the
+static settings out of the Tornado application, and skips static asset
+indexing entirely, on the expectation that a web server such as nginx
+sits in front of the service and serves those paths straight from
+disk.  Note that `static_url` is unavailable in templates in this mode
+unless `static_path` is added back to `settings` by hand.  See the
+`nginx_snippet` method for a ready-made configuration block.
+"""
+
+_HELP_SERVICE_PREFIX = """
+Service URL prefix
+
+By default, this is `JUPYTERHUB_SERVICE_PREFIX/services/{name}` where
+`JUPYTERHUB_SERVICE_PREFIX` is an environment variable and `{name}` is
+the name of the service.  See documentation on the `name` parameter to
+see how it is determined by default.  The environment variable is read
+once at import, so changing it requires a service restart.
+"""
+
+_HELP_STATIC_PATH = """
+Path to static assets like JS and CSS files
+
+By default, this is the same as what JupyterHub uses, and you probably
+should not change it unless you know what you are doing.
+"""
+
+_HELP_STATIC_URL_PREFIX = """
+Static URL prefix for assets like JS and CSS files
+
+By default, this is the same as what JupyterHub uses, and you probably
+should not change it unless you know what you are doing.
+"""
+
+_HELP_TEMPLATE_PATHS = """
+Path to additional or specialized templates
+
+By default, the service uses the templates that JupyterHub uses and
+additional templates installed when the package is installed.  These 
+can be supplemented by additional templates using this parameter.
+"""
+
+_HELP_RULES = """
+List of Tornado RequestHandler rule specifications
+
+By default, the service initializes with two Tornado RequestHandler
+rule specifications defined.  These handle static assets like JS, CSS,
+and logo files that JupyterHub's templates depend on.  These are stored
+on a parameter so that the user may manipulate or change them if they
+want to, after the service has been initialized and parameters are
+concretized, but before the service's Tornado application is started.
+"""
+
+_HELP_SETTINGS = """
+Settings to pass to Tornado web application
+
+By default, the service initializes with settings for `static_path` and
+`static_url_path` defined.  These are stored on a parameter so that the
+user may manipulate or change them if they want to, after the service
+has been initialized and parameters are concretized, but before the
+services' Tornado application is started.
+"""
+
+_HELP_ROUTER = """
+Router that fast-paths static asset requests
+
+Initialized along with the web application, this router dispatches
+requests under the static URL prefix with a single prefix comparison
+rather than matching each application rule's regex in turn.
+"""
+
+@functools.lru_cache(maxsize=None)
+def _scandir_loader_cls():
+    """Build the scandir-based template loader class
+
+    Defined in a cached factory rather than at module scope so that Jinja2
+    is only imported once an environment is actually built.
+    """
+    from jinja2 import FileSystemLoader
+
+    class ScandirFileSystemLoader(FileSystemLoader):
+        """Template loader that enumerates templates with `os.scandir`
+
+        `DirEntry` objects carry file-type information from the directory
+        read itself, so listing templates costs one directory enumeration
+        per directory instead of an additional stat call per file.
+        """
+
+        def list_templates(self):
+            found = set()
+            for searchpath in self.searchpath:
+                stack = [searchpath]
+                while stack:
+                    try:
+                        entries = os.scandir(stack.pop())
+                    except OSError:
+                        continue
+                    with entries:
+                        for dirent in entries:
+                            if dirent.is_dir(
+                                follow_symlinks=self.followlinks
+                            ):
+                                stack.append(dirent.path)
+                            elif dirent.is_file():
+                                found.add(os.path.relpath(
+                                    dirent.path, searchpath
+                                ).replace(os.sep, "/"))
+            return sorted(found)
+
+    return ScandirFileSystemLoader
+
+@functools.lru_cache(maxsize=None)
+def _make_environment(template_paths, base_paths, auto_reload):
+    """Build a Jinja2 environment, shared by any services with the same paths
+
+    Template compilation is expensive, so the environment is cached on its
+    arguments (which must therefore be hashable tuples) and compiled template
+    bytecode is persisted to a single on-disk cache shared by every service
+    run by the same user, amortizing compilation across service subclasses
+    and restarts.  By default the cache lives in Jinja2's own per-user
+    temporary directory, which is created mode 0o700 with an ownership
+    check; the `JHSP_JINJA_CACHE` environment variable selects a different
+    directory, which should likewise not be writable by other users.
+    """
+    from jinja2 import (
+        ChoiceLoader,
+        Environment,
+        FileSystemBytecodeCache,
+        PrefixLoader
+    )
+    loader_cls = _scandir_loader_cls()
+    cache_dir = os.environ.get("JHSP_JINJA_CACHE")
+    if cache_dir:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    return Environment(
+        loader=ChoiceLoader([
+            PrefixLoader({"templates": loader_cls(base_paths[:1])}, "/"),
+            loader_cls(template_paths + base_paths)
+        ]),
+        auto_reload=auto_reload,
+        bytecode_cache=FileSystemBytecodeCache(
+            directory=cache_dir,
+            pattern="%s.cache"
+        )
+    )
+
+@functools.lru_cache(maxsize=None)
+def _fast_formatter_cls():
+    """Build the service log formatter class
+
+    Defined in a cached factory rather than at module scope so that the
+    JupyterHub base class is only imported once logging is actually set up.
+    """
+    from jupyterhub.log import CoroutineLogFormatter
+
+    class FastFormatter(CoroutineLogFormatter):
+        """Log formatter that caches formatted timestamps per second
+
+        Access logs tend to burst within the same wall-clock second, so
+        `formatTime` memoizes its result on the integer part of the record's
+        timestamp instead of calling `strftime` for every record.
+        Millisecond precision still comes from the `%(msecs)` field in the
+        log format, which is computed per record as usual.
+        """
+
+        _cached_second = None
+        _cached_time = ""
+
+        def formatTime(self, record, datefmt=None):
+            if datefmt is None:
+                # the stdlib default format embeds milliseconds, so it
+                # cannot be cached per second
+                return super().formatTime(record, datefmt)
+            second = int(record.created)
+            if second != self._cached_second:
+                self._cached_second = second
+                self._cached_time = super().formatTime(record, datefmt)
+            return self._cached_time
+
+    return FastFormatter
+
+def __getattr__(name):
+    """Expose the lazily built formatter class as a module attribute
+
+    traitlets configures logging with the formatter's dotted import path,
+    so `FastFormatter` must be resolvable on this module even though it is
+    only constructed on first use.
+    """
+    if name == "FastFormatter":
+        return _fast_formatter_cls()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class CachedLogoHandler(web.RequestHandler):
+    """Serve the service logo from bytes preloaded at initialization
+
+    JupyterHub's `LogoHandler` stats and reads the logo file on every
+    request.  The logo is fixed for the life of the service, so it is read
+    into memory once with its headers precomputed, and requests reduce to an
+    ETag check plus a socket write.
+    """
+
+    def initialize(self, content, etag, content_type):
+        self.content = content
+        self.etag = etag
+        self.content_type = content_type
+
+    def get(self, include_body=True):
+        self.set_header("Etag", f'"{self.etag}"')
+        self.set_header("Content-Type", self.content_type)
+        self.set_header("Cache-Control", "public, max-age=31536000, immutable")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        if include_body:
+            self.write(self.content)
+        else:
+            self.set_header("Content-Length", len(self.content))
+
+    def head(self):
+        return self.get(include_body=False)
+
+class PrefixRouter(routing.Router):
+    """Route static asset requests by prefix comparison before regex matching
+
+    The static handler's URL pattern only ever needs a prefix match, so
+    requests under the static prefix are dispatched with a single
+    `startswith` check instead of scanning the application's regex rules.
+    Everything else falls through to the wrapped application.
+    """
+
+    def __init__(self, webapp, static_prefix, handler, kwargs):
+        self.webapp = webapp
+        self.static_prefix = static_prefix
+        self.handler = handler
+        self.kwargs = kwargs
+
+    def find_handler(self, request, **kwargs):
+        path = request.path
+        if path.startswith(self.static_prefix):
+            # percent-decode the suffix just as the regex route decodes its
+            # match groups, so both dispatch paths agree on the same URLs
+            return self.webapp.get_handler_delegate(
+                request,
+                self.handler,
+                self.kwargs,
+                path_args=[escape.url_unescape(
+                    path[len(self.static_prefix):], plus=False
+                )]
+            )
+        return self.webapp.find_handler(request, **kwargs)
+
+class StaticEntry:
+    """Precomputed metadata for a single static asset
+
+    Everything needed to answer a request for the asset, short of the file
+    contents themselves, is computed once when the service initializes: size,
+    modification time, ETag, and content type.  Compressed variants are kept
+    in `gz` and `br` as `(source, size)` pairs, where the source is either
+    the path of a precompressed `.gz`/`.br` sibling file or, for compressible
+    content types, bytes compressed in memory at initialization.
+    """
+
+    def __init__(self, path, size, mtime, content_type):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = hashlib.md5(f"{path}{size}{mtime}".encode()).hexdigest()
+        self.content_type = content_type or "application/octet-stream"
+        self.gz = self.sibling(path + ".gz")
+        self.br = self.sibling(path + ".br")
+        if self.compressible():
+            self.precompress()
+
+    @staticmethod
+    def sibling(path):
+        """Return `(path, size)` for a precompressed sibling file, or None"""
+        try:
+            return path, os.stat(path).st_size
+        except OSError:
+            return None
+
+    def compressible(self):
+        """Return whether the asset is worth compressing in memory"""
+        if self.size > _COMPRESS_LIMIT:
+            return False
+        if self.gz is not None and (self.br is not None or brotli is None):
+            return False
+        return (
+            self.content_type.startswith("text/")
+            or self.content_type in _COMPRESSIBLE_TYPES
+        )
+
+    def precompress(self):
+        """Precompress the asset for clients that accept gzip or brotli
+
+        Variants are only kept when they are actually smaller than the
+        original, and precompressed sibling files always win over in-memory
+        compression.
+        """
+        with open(self.path, "rb") as source:
+            data = source.read()
+        if self.gz is None:
+            compressed = gzip.compress(data, compresslevel=9)
+            if len(compressed) < self.size:
+                self.gz = (compressed, len(compressed))
+        if self.br is None and brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < self.size:
+                self.br = (compressed, len(compressed))
+
+class StaticIndexHandler(web.StaticFileHandler):
+    """Serve static assets from a precomputed index
+
+    Unlike Tornado's `StaticFileHandler`, which stats the file and recomputes
+    headers on every request, this handler looks the asset up in an index
+    built once at service initialization and serves it with the precomputed
+    headers.  Subclassing `StaticFileHandler` keeps `static_url()` support
+    for templates.
+    """
+
+    def initialize(self, path=None, index=None):
+        self.root = path
+        self.index = index if index is not None else {}
+
+    async def get(self, path, include_body=True):
+        entry = self.index.get(path)
+        if entry is None:
+            raise web.HTTPError(404)
+        self.set_header("Etag", f'"{entry.etag}"')
+        self.set_header("Last-Modified", httputil.format_timestamp(entry.mtime))
+        self.set_header("Content-Type", entry.content_type)
+        if self.get_argument("v", None):
+            # versioned URLs, as produced by static_url(), change whenever
+            # the content does, so they can be cached far into the future
+            self.set_header("Cache-Control", f"max-age={self.CACHE_MAX_AGE}")
+            self.set_header(
+                "Expires",
+                httputil.format_timestamp(time.time() + self.CACHE_MAX_AGE)
+            )
+        if self.should_return_304(entry):
+            self.set_status(304)
+            return
+        source, size, encoding = self.select_encoding(entry)
+        if encoding:
+            self.set_header("Content-Encoding", encoding)
+            self.set_header("Vary", "Accept-Encoding")
+        self.set_header("Content-Length", size)
+        if include_body:
+            if isinstance(source, bytes):
+                self.write(source)
+            else:
+                await self.send_file(source, size)
+
+    def should_return_304(self, entry):
+        """Return whether the client already has a current copy"""
+        if self.check_etag_header():
+            return True
+        ims = self.request.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                date = parsedate_to_datetime(ims)
+            except (TypeError, ValueError):
+                return False
+            if date.timestamp() >= int(entry.mtime):
+                return True
+        return False
+
+    def select_encoding(self, entry):
+        """Return `(path, size, encoding)` for the best variant of an entry"""
+        accepted = {
+            token.split(";")[0].strip()
+            for token in self.request.headers.get("Accept-Encoding", "").split(",")
+        }
+        if entry.br and "br" in accepted:
+            return entry.br + ("br",)
+        if entry.gz and "gzip" in accepted:
+            return entry.gz + ("gzip",)
+        return entry.path, entry.size, None
+
+    async def send_file(self, path, size):
+        """Send a file to the client, zero-copy where possible
+
+        Once the headers are flushed, the body is handed to `os.sendfile` so
+        the kernel copies bytes from the page cache straight to the socket
+        with no user-space buffering.  TLS connections (where the raw socket
+        carries encrypted data) and platforms without `sendfile` stream the
+        body through Tornado's write path in chunks instead, as does any
+        remainder left when `sendfile` would block.
+        """
+        await self.flush()
+        offset = 0
+        with open(path, "rb") as source:
+            socket = self.sendfile_socket()
+            if socket is not None:
+                while offset < size:
+                    try:
+                        sent = os.sendfile(
+                            socket.fileno(),
+                            source.fileno(),
+                            offset,
+                            size - offset
+                        )
+                    except (BlockingIOError, OSError):
+                        break
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset:
+                    # credit bytes sent outside Tornado's write path so
+                    # finish() does not flag a Content-Length mismatch
+                    connection = self.request.connection
+                    remaining = getattr(
+                        connection, "_expected_content_remaining", None
+                    )
+                    if remaining is not None:
+                        connection._expected_content_remaining = (
+                            remaining - offset
+                        )
+                if offset >= size:
+                    return
+                source.seek(offset)
+            while offset < size:
+                chunk = source.read(65536)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                self.write(chunk)
+                await self.flush()
+
+    def sendfile_socket(self):
+        """Return the connection's raw socket if `os.sendfile` may use it"""
+        if not hasattr(os, "sendfile"):
+            return None
+        stream = getattr(self.request.connection, "stream", None)
+        if stream is None or isinstance(stream, iostream.SSLIOStream):
+            return None
+        return getattr(stream, "socket", None)
+
+@functools.lru_cache(maxsize=None)
+def _build_static_index(static_path):
+    """Index static assets so requests avoid per-file stat work
+
+    The static directory is walked once and each asset's headers are
+    precomputed into a `StaticEntry`, keyed by the URL path relative to the
+    static prefix.  Serving an asset is then a dict lookup rather than
+    per-request stat/open/format work.  Cached on the path so repeated
+    service initialization (e.g. across a test suite) shares one index.
+    """
+    index = {}
+    stack = [static_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for dirent in entries:
+                # never follow directory symlinks: a cycle would make this
+                # walk descend forever
+                if dirent.is_dir(follow_symlinks=False):
+                    stack.append(dirent.path)
+                elif dirent.is_file() and not dirent.name.endswith((".gz", ".br")):
+                    stat = dirent.stat()
+                    key = os.path.relpath(
+                        dirent.path, static_path
+                    ).replace(os.sep, "/")
+                    index[key] = StaticEntry(
+                        dirent.path,
+                        stat.st_size,
+                        stat.st_mtime,
+                        mimetypes.guess_type(dirent.path)[0]
+                    )
+    return index
+
+@functools.lru_cache(maxsize=None)
+def _static_rule(service_prefix, static_path):
+    """Return a static file handler rule, cached on its inputs
+
+    The handler kwargs are wrapped in a `MappingProxyType` since the cached
+    rule is shared between callers.
+    """
+    return (
+        service_prefix + r"static/(.*)",
+        StaticIndexHandler,
+        MappingProxyType({"index": _build_static_index(static_path)})
+    )
+
+@functools.lru_cache(maxsize=None)
+def _logo_rule(service_prefix, logo_file):
+    """Return a logo handler rule, cached on its inputs
+
+    The logo is read and its headers computed only the first time a rule for
+    the prefix and file is requested.
+    """
+    with open(logo_file, "rb") as source:
+        content = source.read()
+    return (
+        service_prefix + r"logo",
+        CachedLogoHandler,
+        MappingProxyType({
+            "content": content,
+            "etag": hashlib.md5(content).hexdigest(),
+            "content_type": mimetypes.guess_type(logo_file)[0] or "image/png"
+        })
+    )
+
 class Service(Application):
 
     flags = Dict({
@@ -28,14 +614,13 @@ class Service(Application):
             "Generate default config"
         )})
 
-    config_file = Unicode(
-        help=dedent("""
-        Name of file used to configure service
+    auto_reload = Bool(
+        False,
+        help=_HELP_AUTO_RELOAD
+    ).tag(config=True)
 
-        By default, the name of the configuration file is `{name}_config.py`,
-        where `{name}` is the name of the service.  See documentation on the
-        `name` parameter to see how it is determined by default.
-        """)
+    config_file = Unicode(
+        help=_HELP_CONFIG_FILE
     ).tag(config=True)
 
     @default("config_file")
@@ -44,13 +629,7 @@ class Service(Application):
 
     generate_config = Bool(
         False, 
-        help=dedent("""
-        Whether or not to produce default configuration file and exit
-
-        If `True`, a default configuration script will be produced to standard
-        output and the service then exits.  If `False` the service initializes
-        and runs.
-        """)
+        help=_HELP_GENERATE_CONFIG
     ).tag(config=True)
 
     @default("log_level")
@@ -68,30 +647,25 @@ class Service(Application):
         return "%(color)s[%(levelname)1.1s %(asctime)s.%(msecs).03d %(name)s %(module)s:%(lineno)d]%(end_color)s %(message)s"
 
     logo_file = Unicode(
-        help=dedent("""
-        Path to logo file
-
-        By default, the logo file path is the path to the JupyterHub logo, but
-        this can be changed to another logo file.
-        """)
+        help=_HELP_LOGO_FILE
     ).tag(config=True)
 
     @default("logo_file")
     def default_logo_file(self):
-        return os.path.join(DATA_FILES_PATH, "static/images/jupyterhub-80.png")
+        return _hub_logo_file()
 
     name = Unicode(
-        help=dedent("""
-        Name of service
+        help=_HELP_NAME
+    ).tag(config=True)
 
-        By default, the name of a service is the same as its package name.
-        """)
+    offload_static = Bool(
+        False,
+        help=_HELP_OFFLOAD_STATIC
     ).tag(config=True)
 
     @default("name")
     def default_name(self):
-        module_name = inspect.getmodule(self).__name__
-        return module_name.split(".")[0]
+        return type(self).__module__.split(".", 1)[0]
 
     port = Integer(
         8888,
@@ -99,82 +673,49 @@ class Service(Application):
     ).tag(config=True)
 
     service_prefix = Unicode(
-        help=dedent("""
-        Service URL prefix
-
-        By default, this is `JUPYTERHUB_SERVICE_PREFIX/services/{name}` where
-        `JUPYTERHUB_SERVICE_PREFIX` is an environment variable and `{name}` is
-        the name of the service.  See documentation on the `name` parameter to
-        see how it is determined by default.
-        """)
+        help=_HELP_SERVICE_PREFIX
     ).tag(config=True)
 
     @default("service_prefix")
     def default_service_prefix(self):
-        return os.environ.get(
-            "JUPYTERHUB_SERVICE_PREFIX",
-            f"/services/{self.name}/"
-        )
+        return _ENV_PREFIX if _ENV_PREFIX else f"/services/{self.name}/"
 
     static_path = Unicode(
-        help=dedent("""
-        Path to static assets like JS and CSS files
-
-        By default, this is the same as what JupyterHub uses, and you probably
-        should not change it unless you know what you are doing.
-        """)
+        help=_HELP_STATIC_PATH
     ).tag(config=True)
 
     @default("static_path")
     def default_static_path(self):
-        return os.path.join(DATA_FILES_PATH, "static")
+        return _hub_static_path()
 
     static_url_prefix = Unicode("",
-        help=dedent("""
-        Static URL prefix for assets like JS and CSS files
-
-        By default, this is the same as what JupyterHub uses, and you probably
-        should not change it unless you know what you are doing.
-        """)
+        help=_HELP_STATIC_URL_PREFIX
     ).tag(config=True)
 
     @default("static_url_prefix")
     def default_static_url_prefix(self):
-        return url_path_join(self.service_prefix, "static/")
+        # equivalent to url_path_join(prefix, "static/") for the two known
+        # components, without the general-purpose split/join
+        prefix = self.service_prefix
+        if prefix.endswith("/"):
+            return prefix + "static/"
+        return prefix + "/static/"
 
     template_paths = List(
-        help=dedent("""
-        Path to additional or specialized templates
-
-        By default, the service uses the templates that JupyterHub uses and
-        additional templates installed when the package is installed.  These 
-        can be supplemented by additional templates using this parameter.
-        """)
+        help=_HELP_TEMPLATE_PATHS
     ).tag(config=True)
     
+    # Both of these are assigned wholesale during initialize(); the static
+    # empty defaults only exist for instances inspected before then, so the
+    # lazy trait-default machinery never has to build anything interesting.
     rules = List(
-        help=dedent("""
-        List of Tornado RequestHandler rule specifications
-
-        By default, the service initializes with two Tornado RequestHandler
-        rule specifications defined.  These handle static assets like JS, CSS,
-        and logo files that JupyterHub's templates depend on.  These are stored
-        on a parameter so that the user may manipulate or change them if they
-        want to, after the service has been initialized and parameters are
-        concretized, but before the service's Tornado application is started.
-        """)
+        default_value=(),
+        help=_HELP_RULES
     )
 
     settings = Dict(
-        help=dedent("""
-        Settings to pass to Tornado web application
-
-        By default, the service initializes with settings for `static_path` and
-        `static_url_path` defined.  These are stored on a parameter so that the
-        user may manipulate or change them if they want to, after the service
-        has been initialized and parameters are concretized, but before the
-        services' Tornado application is started.
-        """)
+        default_value={},
+        help=_HELP_SETTINGS
     )
 
     webapp = Instance(
@@ -182,14 +723,31 @@ class Service(Application):
         help="Tornado web application object for service"
     )
 
+    router = Instance(
+        routing.Router,
+        allow_none=True,
+        help=_HELP_ROUTER
+    )
+
     def initialize(self, argv=None):
         """Initialize application but does not initialize Tornado app"""
         super().initialize(argv)
         self.handle_config()
         self.init_logging()
-        self.init_rules()
-        self.init_settings()
-        self.init_loader()
+        # Read each trait once; every access goes through a descriptor call.
+        name = self.name
+        service_prefix = self.service_prefix
+        static_path = self.static_path
+        if self.offload_static:
+            # A front-end proxy serves static assets and the logo directly,
+            # so skip indexing and install no handlers for them.
+            self._static_index = {}
+            self.rules = []
+        else:
+            self.init_static(static_path)
+            self.init_rules(service_prefix, self.logo_file)
+        self.init_settings(static_path, self.static_url_prefix)
+        self.init_loader(name, self.template_paths)
 
     def handle_config(self):
         """Generate configuration file and exit, or read in if it exists"""
@@ -199,56 +757,130 @@ class Service(Application):
         if self.config_file:
             self.load_config_file(self.config_file)
 
-    def init_rules(self):
+    def init_static(self, static_path):
+        """Index static assets so requests avoid per-file stat work"""
+        self._static_index = _build_static_index(static_path)
+
+    def init_rules(self, service_prefix, logo_file):
         """Initialize base Tornado web app rules"""
         self.rules = [
-            self.static_file_handler_rule(),
-            self.logo_handler_rule()
+            self.static_file_handler_rule(service_prefix),
+            self.logo_handler_rule(service_prefix, logo_file)
         ]
 
-    def static_file_handler_rule(self):
+    def static_file_handler_rule(self, service_prefix):
         """Return static file handler Tornado web app rule"""
-        return (
-            self.service_prefix + r"static/(.*)",
-            web.StaticFileHandler,
-            {"path": self.static_path}
-        )
+        return _static_rule(service_prefix, self.static_path)
 
-    def logo_handler_rule(self):
+    def logo_handler_rule(self, service_prefix, logo_file):
         """Return logo handler Tornado web app rule"""
-        return (
-            self.service_prefix + r"logo",
-            LogoHandler,
-            {"path": self.logo_file}
-        )
-
-    def init_settings(self):
-        """Initialize Tornado web app settings"""
+        return _logo_rule(service_prefix, logo_file)
+
+    def init_settings(self, static_path, static_url_prefix):
+        """Initialize Tornado web app settings
+
+        With `offload_static` the static settings are left out as well:
+        passing `static_path` would make Tornado install its own static
+        route ahead of user rules, answering for paths the front-end proxy
+        already owns.
+        """
+        if self.offload_static:
+            self.settings = {"static_url_prefix": static_url_prefix}
+            return
         self.settings = {
-            "static_path": self.static_path, 
-            "static_url_prefix": self.static_url_prefix
+            "static_path": static_path,
+            "static_url_prefix": static_url_prefix,
+            "static_handler_class": StaticIndexHandler,
+            "static_handler_args": {"index": self._static_index}
         }
 
-    def init_loader(self):
-        """Initialize Template loader"""
-        paths = self.base_template_paths()
-        self.loader = ChoiceLoader([
-            PrefixLoader({"templates": FileSystemLoader(paths[:1])}, "/"),
-            FileSystemLoader(self.template_paths + paths)
-        ])
-
-    def base_template_paths(self):
-        """Return paths for service and JupyterHub Jinja2 templates"""
-        return [
-            os.path.join(DATA_FILES_PATH, f"{self.name}/templates"),
-            os.path.join(DATA_FILES_PATH, "templates")
-        ]
+    def init_loader(self, name, template_paths):
+        """Initialize Jinja2 environment and template loader"""
+        self.environment = _make_environment(
+            tuple(template_paths),
+            self.base_template_paths(name),
+            self.auto_reload
+        )
+        self.loader = self.environment.loader
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def base_template_paths(name):
+        """Return paths for service and JupyterHub Jinja2 templates
+
+        Cached on the service name, since the paths only depend on it and the
+        install-time data files location.
+        """
+        return (
+            os.path.join(_data_files_path(), f"{name}/templates"),
+            _hub_templates_path()
+        )
 
-    def init_webapp(self, rules=[]):
-        """Initialize web app with service+JupyterHub rules and settings"""
-        self.webapp = web.Application(rules + self.rules, **self.settings)
+    def init_webapp(self, rules=None):
+        """Initialize web app with service+JupyterHub rules and settings
+
+        Rules are compiled into `URLSpec` objects once, up front, and a
+        `PrefixRouter` is layered over the application so that static asset
+        requests skip regex matching entirely.  The fast path is only
+        installed while the service's own static rule is still among
+        `self.rules`; if the user replaced or removed it, dispatch falls
+        back to the application's rule chain so their changes take effect.
+        """
+        rules = () if rules is None else tuple(rules)
+        self._compiled_rules = [
+            rule if isinstance(rule, web.URLSpec) else web.URLSpec(*rule)
+            for rule in rules + tuple(self.rules)
+        ]
+        self.webapp = web.Application(self._compiled_rules, **self.settings)
+        if self.static_rule_active():
+            self.router = PrefixRouter(
+                self.webapp,
+                self.static_url_prefix,
+                StaticIndexHandler,
+                {"index": self._static_index}
+            )
+        else:
+            self.router = None
+
+    def static_rule_active(self):
+        """Return whether the service's own static rule is still installed
+
+        Always `False` when static serving is offloaded or nothing was
+        indexed, so the prefix fast path is never installed over an empty
+        index and static paths reach the application's rule chain (and any
+        handlers the user added there).  The check also avoids building an
+        index that `offload_static` deliberately skipped.
+        """
+        if self.offload_static or not getattr(self, "_static_index", None):
+            return False
+        return _static_rule(self.service_prefix, self.static_path) in self.rules
+
+    def nginx_snippet(self):
+        """Return nginx location blocks that serve static assets directly
+
+        Paste the result into the server block of the nginx instance that
+        proxies the service, and set `offload_static = True` so the Python
+        process stops serving these paths itself.  nginx then reads assets
+        straight from disk, with `gzip_static` picking up any precompressed
+        `.gz` siblings.
+        """
+        return (
+            f"location ^~ {self.service_prefix}static/ {{\n"
+            f"    alias {self.static_path}/;\n"
+            f"    expires max;\n"
+            f"    access_log off;\n"
+            f"    gzip_static on;\n"
+            f"}}\n"
+            f"location = {self.service_prefix}logo {{\n"
+            f"    alias {self.logo_file};\n"
+            f"    expires max;\n"
+            f"    access_log off;\n"
+            f"}}\n"
+        )
 
-    _log_formatter_cls = CoroutineLogFormatter
+    @property
+    def _log_formatter_cls(self):
+        return _fast_formatter_cls()
 
     def init_logging(self): # Mostly copied from JupyterHub
         """Initialize logging to have JupyterHub conventions"""
@@ -261,10 +893,10 @@ class Service(Application):
             fmt=self.log_format, datefmt=self.log_datefmt
         )
 
-        # hook up tornado 3's loggers to our app handlers
-        for log in (app_log, access_log, gen_log):
-            # ensure all log statements identify the application they come from
-            log.name = self.log.name
+        # hook up tornado 3's loggers to our app handlers, ensuring all log
+        # statements identify the application they come from
+        log_name = self.log.name
+        app_log.name = access_log.name = gen_log.name = log_name
         logger = logging.getLogger('tornado')
         logger.propagate = True
         logger.parent = self.log
@@ -272,5 +904,6 @@ class Service(Application):
 
     def start(self):
         """Commence being a service"""
-        self.webapp.listen(self.port)
+        server = httpserver.HTTPServer(self.router or self.webapp)
+        server.listen(self.port)
         ioloop.IOLoop.current().start()
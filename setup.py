@@ -1,12 +0,0 @@
-#!/usr/bin/env python
-
-from distutils.core import setup
-
-setup(
-    author="R. C. Thomas",
-    author_email="rcthomas@lbl.gov",
-    description="Base JupyterHub service page",
-    name="jupyterhub-service-page",
-    packages=["jupyterhub_service_page"],
-    version="0.1.0",
-)